@@ -47,6 +47,7 @@ Options:
 """
 from .aoSupervisor import AoSupervisor
 import numpy as np
+from typing import Tuple
 
 import shesha.constants as scons
 from shesha.constants import CONST
@@ -327,9 +328,9 @@ class CompassSupervisor(AoSupervisor):
         '''
         return np.array(self._sim.wfs.d_wfs[numWFS].d_hrimg)
 
-    def getSlopeGeom(self, numWFS: int) -> np.ndarray:
+    def getSlopeGeom(self, ncontrol: int = 0) -> np.ndarray:
         '''
-        return the slopes geom of WFS number numWFS
+        return the slopes geom of all the WFSs handled by the controller ncontrol
         '''
         self._sim.rtc.do_centroids_geom(ncontrol)
         slopesGeom = np.array(self._sim.rtc.d_control[ncontrol].d_centroids)
@@ -347,6 +348,19 @@ class CompassSupervisor(AoSupervisor):
             avgVar = src.phase_var_avg / src.phase_var_count
         return [src.strehl_se, src.strehl_le, src.phase_var, avgVar]
 
+    def getAllStrehl(self, do_fit: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        return the short and long exposure Strehl Ratios of all the targets
+        '''
+        ntar = len(self._sim.tar.d_targets)
+        strehl_se = np.empty(ntar, dtype=np.float32)
+        strehl_le = np.empty(ntar, dtype=np.float32)
+        for t, src in enumerate(self._sim.tar.d_targets):
+            src.comp_strehl(do_fit)
+            strehl_se[t] = src.strehl_se
+            strehl_le[t] = src.strehl_le
+        return strehl_se, strehl_le
+
     def getIFsparse(self, nControl: int):
         '''
         Return the IF of DM as a sparse matrix
@@ -0,0 +1,78 @@
+## @package   shesha.util.display_util
+## @brief     Optional numba kernels of the display widgets
+## @author    COMPASS Team <https://github.com/ANR-COMPASS>
+## @version   4.3.1
+## @date      2026/10/14
+## @copyright GNU Lesser General Public License
+#
+#  This file is part of COMPASS <https://anr-compass.github.io/compass/>
+#
+#  Copyright (C) 2011-2019 COMPASS Team <https://github.com/ANR-COMPASS>
+#  All rights reserved.
+#  Distributed under GNU - LGPL
+#
+#  COMPASS is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser 
+#  General Public License as published by the Free Software Foundation, either version 3 of the License, 
+#  or any later version.
+#
+#  COMPASS: End-to-end AO simulation tool using GPU acceleration 
+#  The COMPASS platform was designed to meet the need of high-performance for the simulation of AO systems. 
+#  
+#  The final product includes a software package for simulating all the critical subcomponents of AO, 
+#  particularly in the context of the ELT and a real-time core based on several control approaches, 
+#  with performances consistent with its integration into an instrument. Taking advantage of the specific 
+#  hardware architecture of the GPU, the COMPASS tool allows to achieve adequate execution speeds to
+#  conduct large simulation campaigns called to the ELT. 
+#  
+#  The COMPASS platform can be used to carry a wide variety of simulations to both testspecific components 
+#  of AO of the E-ELT (such as wavefront analysis device with a pyramid or elongated Laser star), and 
+#  various systems configurations such as multi-conjugate AO.
+#
+#  COMPASS is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the 
+#  implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  
+#  See the GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License along with COMPASS. 
+#  If not, see <https://www.gnu.org/licenses/lgpl-3.0.txt>.
+
+import math
+
+import numpy as np
+
+# numba is optional: every kernel of this module is None without it, the widgets
+# then use their NumPy code path
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+psf_log_scale = None
+
+if HAS_NUMBA:
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def psf_log_scale(data, floor, out):
+        '''
+            out = log10(max(data, floor)), returning the (min, max) of out
+            A single pass over the image instead of clip, log10, min and max
+        '''
+        # Start from an actual value: fastmath assumes there is no inf
+        lo = hi = math.log10(max(data[0, 0], floor))
+        for i in prange(data.shape[0]):
+            for j in range(data.shape[1]):
+                v = math.log10(max(data[i, j], floor))
+                out[i, j] = v
+                lo = min(lo, v)
+                hi = max(hi, v)
+        return lo, hi
+
+
+def warmup() -> None:
+    '''
+        Compile the kernels for the images displayed (float32), so that it is not
+        done at the first display. Nothing to do without numba
+    '''
+    if HAS_NUMBA:
+        data = np.ones((2, 2), dtype=np.float32)
+        psf_log_scale(data, np.float32(1e-30), np.empty_like(data))
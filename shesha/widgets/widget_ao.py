@@ -53,6 +53,7 @@ Options:
 """
 
 import os, sys
+import logging
 
 import numpy as np
 import time
@@ -60,22 +61,23 @@ import time
 import pyqtgraph as pg
 from pyqtgraph.dockarea import Dock, DockArea
 
-from shesha.util.tools import plsh, plpyr
+from shesha.util.tools import plsh
+from shesha.util import display_util
 
 import warnings
 
 from PyQt5 import QtGui, QtWidgets
 from PyQt5.uic import loadUiType
-from PyQt5.QtCore import QThread, QTimer, Qt
+from PyQt5.QtCore import QThread, QTimer, Qt, pyqtSignal
 
 from subprocess import Popen, PIPE
 
-from typing import Any, Dict, Tuple, Callable, List
+from typing import Any, Dict, Tuple, Callable, List, FrozenSet
 
 from docopt import docopt
-from collections import deque
+from functools import lru_cache, partial
 
-from shesha.widgets.widget_base import WidgetBase, uiLoader
+from shesha.widgets.widget_base import WidgetBase, DisplayFetcher, PupilPath, uiLoader
 
 AOWindowTemplate, AOClassTemplate = uiLoader('widget_ao')
 
@@ -87,8 +89,103 @@ from shesha.supervisor.compassSupervisor import CompassSupervisor, scons
 # Pdb().set_trace()
 
 
+@lru_cache(maxsize=None)
+def _unitCircle(npts: int) -> np.ndarray:
+    '''
+        Return the npts samples of the unit circle as complex numbers cos + i.sin
+    '''
+    unit = np.exp(1j * (np.arange(npts) + 1) * (2. * np.pi / npts))
+    unit.setflags(write=False)
+    return unit
+
+
+CIRCLE_NPTS = 1000  # Number of points of the pupil circles
+_unitCircle(CIRCLE_NPTS)  # Sampled once at import time
+
+
+def circleCoords(ampli: float, npts: int, datashape0: int,
+                 datashape1: int) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+        Return the coordinates of a circle of radius ampli centered on the image
+    '''
+    unit = _unitCircle(npts)
+    return ampli * unit.imag + datashape0 / 2, ampli * unit.real + datashape1 / 2
+
+
+@lru_cache(maxsize=32)
+def circlePath(ampli: float, npts: int, datashape0: int,
+               datashape1: int) -> pg.QtGui.QPainterPath:
+    '''
+        Return the circle of circleCoords as a QPainterPath, shared by all the
+        viewboxes drawing the same circle
+    '''
+    return pg.arrayToQPath(*circleCoords(ampli, npts, datashape0, datashape1))
+
+
+@lru_cache(maxsize=32)
+def crossArrays(datashape: Tuple[int, ...], delta: float) -> Tuple[np.ndarray, ...]:
+    '''
+        Return the (x, y) coordinates of the horizontal then vertical segments of
+        a cross of half width delta centered on the image, as read-only arrays
+    '''
+    xc = datashape[0] / 2 + 0.5
+    yc = datashape[1] / 2 + 0.5
+    arrays = (np.array([xc - delta, xc + delta]), np.array([yc, yc]), np.array([xc, xc]),
+              np.array([yc - delta, yc + delta]))
+    for array in arrays:
+        array.setflags(write=False)
+    return arrays
+
+
+class DisplayEntry:
+    '''
+        Everything the display needs to know about one dock, gathered under its key
+    '''
+    __slots__ = ('img', 'viewbox', 'dock', 'srcircle', 'crossx', 'crossy', 'pyrx', 'pyry',
+                 'kind', 'index', 'getter', 'logbuf', 'logfloor', 'logfloorAge', 'levels',
+                 'levelsAge', 'quiver')
+
+    def __init__(self, dock: Dock, img: Any = None, viewbox: pg.ViewBox = None) -> None:
+        self.dock = dock
+        self.img = img
+        self.viewbox = viewbox
+        self.srcircle = None  # type: PupilPath
+        self.crossx = None  # type: pg.PlotCurveItem
+        self.crossy = None  # type: pg.PlotCurveItem
+        self.pyrx = None  # type: pg.PlotCurveItem
+        self.pyry = None  # type: pg.PlotCurveItem
+        self.kind = None  # type: str
+        self.index = None  # type: int
+        self.getter = None  # type: Callable[[int], np.ndarray]
+        self.logbuf = None  # type: np.ndarray  # PSF log scale scratch buffer
+        self.logfloor = 0.  # type: float
+        self.logfloorAge = 0  # type: int
+        self.levels = None  # type: Tuple[float, float]
+        self.levelsAge = 0  # type: int
+        self.quiver = None  # type: Any  # Matplotlib quiver of the slope docks
+
+    def removeOverlays(self) -> None:
+        '''
+            Remove the pupil circle, cross and pyramid edges from the viewbox
+        '''
+        for attr in ('srcircle', 'crossx', 'crossy', 'pyrx', 'pyry'):
+            item = getattr(self, attr)
+            if item is not None:
+                self.viewbox.removeItem(item)
+                setattr(self, attr, None)
+
+
 class widgetAOWindow(AOClassTemplate, WidgetBase):
 
+    fetchRequested = pyqtSignal(int, object)  # object: no conversion to a QVariantList
+
+    # Image docks created for each WFS type
+    _WFS_DOCKS = {
+            scons.WFSType.SH: ("SH", ),
+            scons.WFSType.PYRHR: ("pyrFocalPlane", "pyrHR", "pyrLR"),
+            scons.WFSType.PYRLR: ("pyrFocalPlane", "pyrHR", "pyrLR")
+    }  # type: Dict[str, Tuple[str, ...]]
+
     def __init__(self, configFile: Any = None, cacao: bool = False, expert: bool = False,
                  devices: str = None, hideHistograms: bool = False) -> None:
         WidgetBase.__init__(self, hideHistograms=hideHistograms)
@@ -96,9 +193,12 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
 
         self.cacao = cacao
         self.rollingWindow = 100
-        self.SRLE = deque(maxlen=self.rollingWindow)
-        self.SRSE = deque(maxlen=self.rollingWindow)
-        self.numiter = deque(maxlen=self.rollingWindow)
+        # SR history ring buffers: next write position and number of valid samples
+        self._srle = np.empty(self.rollingWindow, dtype=np.float32)
+        self._srse = np.empty(self.rollingWindow, dtype=np.float32)
+        self._niter = np.empty(self.rollingWindow, dtype=np.int64)
+        self._srhead = 0
+        self._srfilled = 0
         self.expert = expert
         self.devices = devices
 
@@ -141,6 +241,7 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
         self.uiAO.wao_atmosphere.clicked[bool].connect(self.set_see_atmos)
         self.dispStatsInTerminal = False
         self.uiAO.wao_clearSR.clicked.connect(self.clearSR)
+        self.uiAO.actionPSF_Log_Scale.toggled.connect(self.clearImageLevels)
         # self.uiAO.actionStats_in_Terminal.toggled.connect(self.updateStatsInTerminal)
 
         self.uiAO.wao_run.setDisabled(True)
@@ -148,15 +249,38 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
         self.uiAO.wao_unzoom.setDisabled(True)
         self.uiAO.wao_resetSR.setDisabled(True)
 
+        # Compiled now rather than at the first log scaled PSF display
+        display_util.warmup()
+
         p1 = self.uiAO.wao_SRPlotWindow.addPlot(title='SR evolution')
         self.curveSRSE = p1.plot(pen=(255, 0, 0), symbolBrush=(255, 0, 0), name="SR SE")
         self.curveSRLE = p1.plot(pen=(0, 0, 255), symbolBrush=(0, 0, 255), name="SR LE")
 
-        self.SRCrossX = {}  # type: Dict[str, pg.ScatterPlotItem]
-        self.SRCrossY = {}  # type: Dict[str, pg.ScatterPlotItem]
-        self.SRcircles = {}  # type: Dict[str, pg.ScatterPlotItem]
-        self.PyrEdgeX = {}  # type: Dict[str, pg.ScatterPlotItem]
-        self.PyrEdgeY = {}  # type: Dict[str, pg.ScatterPlotItem]
+        # dock key -> display entry, getters being resolved by initConfigFinished
+        self.displays = {}  # type: Dict[str, DisplayEntry]
+        self.levelsRefresh = 10  # Number of displayed frames between two levels updates
+        self._slopeOffsets = np.zeros(1, dtype=np.int64)  # type: np.ndarray
+        self._lastDisplayState = None  # type: Tuple[int, FrozenSet[str], bool]
+        # Changes made without an iteration (e.g. from the interactive session) are
+        # still displayed every idleRefreshTicks display timer ticks
+        self.idleRefreshTicks = 10
+        self._idleTicks = 0
+        self.slopeRefreshTime = 0.2  # Minimal time between two slope displays [s]
+        self._lastSlopeDraw = 0  # type: float
+        self._staleSlopes = frozenset()  # type: FrozenSet[str]  # Slope docks left behind
+        self._wfsType = []  # type: List[str]
+        self._wfsIsPyr = np.zeros(0, dtype=bool)  # type: np.ndarray
+        self._validsubStack = {}  # type: Dict[int, np.ndarray]
+        # Display data are pulled from the simulation in a dedicated thread
+        self._displayGeneration = 0  # Bumped each time the dock dispatch table is rebuilt
+        self._fetchPending = False
+        self.fetcher = DisplayFetcher(self.loopLock, self.isDisplayCurrent,
+                                      context=lambda: self.supervisor.forceContext())
+        self.fetcherThread = QThread()
+        self.fetcher.moveToThread(self.fetcherThread)
+        self.fetchRequested.connect(self.fetcher.fetchAll, Qt.QueuedConnection)
+        self.fetcher.dataReady.connect(self.displayData, Qt.QueuedConnection)
+        self.fetcherThread.start()
 
         self.natm = 0
         self.nwfs = 0
@@ -212,6 +336,7 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
 
     def set_see_atmos(self, atmos):
         self.supervisor.enableAtmos(atmos)
+        self.invalidateDisplay()
 
     def resetSR(self) -> None:
         if self.uiAO.wao_allTarget.isChecked():
@@ -221,11 +346,13 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
             tarnum = self.uiAO.wao_resetSR_tarNum.value()
             print("Reset SR on target %d" % tarnum)
             self.supervisor.resetStrehl(tarnum)
+        self.invalidateDisplay()  # The LE PSF has been reset: redraw it
 
     def add_dispDock(self, name: str, parent, type: str = "pg_image") -> None:
         d = WidgetBase.add_dispDock(self, name, parent, type)
         if type == "SR":
             d.addWidget(self.uiAO.wao_Strehl)
+        self.displays[name] = DisplayEntry(d, self.imgs.get(name), self.viewboxes.get(name))
 
     def loadConfig(self, *args, configFile=None, supervisor=None, **kwargs) -> None:
         '''
@@ -236,29 +363,17 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
         '''
 
         WidgetBase.loadConfig(self)
-        for key, pgpl in self.SRcircles.items():
-            self.viewboxes[key].removeItem(pgpl)
-
-        for key, pgpl in self.SRCrossX.items():
-            self.viewboxes[key].removeItem(pgpl)
-
-        for key, pgpl in self.SRCrossY.items():
-            self.viewboxes[key].removeItem(pgpl)
-
-        for key, pgpl in self.PyrEdgeX.items():
-            self.viewboxes[key].removeItem(pgpl)
-
-        for key, pgpl in self.PyrEdgeY.items():
-            self.viewboxes[key].removeItem(pgpl)
+        for entry in self.displays.values():
+            entry.removeOverlays()
 
         if configFile is None:
             configFile = str(self.uiBase.wao_selectConfig.currentText())
             sys.path.insert(0, self.defaultParPath)
 
         if supervisor is None:
-            self.supervisor = CompassSupervisor()
-            self.supervisor.loadConfig(configFile=configFile)
-        else:
+            supervisor = CompassSupervisor()
+            supervisor.loadConfig(configFile=configFile)
+        with self.loopLock:  # Not while the display fetcher uses the previous one
             self.supervisor = supervisor
         self.config = self.supervisor.getConfig()
 
@@ -272,11 +387,8 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
         except:
             pass
 
-        self.SRcircles.clear()
-        self.SRCrossX.clear()
-        self.SRCrossY.clear()
-        self.PyrEdgeX.clear()
-        self.PyrEdgeY.clear()
+        self.displays.clear()  # New entries, with a fresh display state, are made by add_dispDock
+        self._displayGeneration += 1
 
         self.natm = len(self.config.p_atmos.alt)
         for atm in range(self.natm):
@@ -284,6 +396,11 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
             self.add_dispDock(name, self.wao_phasesgroup_cb)
 
         self.nwfs = len(self.config.p_wfss)
+        self._wfsType = [p_wfs.type for p_wfs in self.config.p_wfss]
+        self._wfsIsPyr = np.array([
+                wfsType in (scons.WFSType.PYRHR, scons.WFSType.PYRLR)
+                for wfsType in self._wfsType
+        ], dtype=bool)
         for wfs in range(self.nwfs):
             name = 'wfs_%d' % wfs
             self.add_dispDock(name, self.wao_phasesgroup_cb)
@@ -291,20 +408,11 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
             self.add_dispDock(name, self.wao_graphgroup_cb, "MPL")
             name = 'slpGeom_%d' % wfs
             self.add_dispDock(name, self.wao_graphgroup_cb, "MPL")
-            if self.config.p_wfss[wfs].type == scons.WFSType.SH:
-                name = 'SH_%d' % wfs
-                self.add_dispDock(name, self.wao_imagesgroup_cb)
-            elif self.config.p_wfss[
-                    wfs].type == scons.WFSType.PYRHR or self.config.p_wfss[
-                            wfs].type == scons.WFSType.PYRLR:
-                name = 'pyrFocalPlane_%d' % wfs
+            if self._wfsType[wfs] not in self._WFS_DOCKS:
+                raise TypeError("Analyser unknown: %s" % self._wfsType[wfs])
+            for suffix in self._WFS_DOCKS[self._wfsType[wfs]]:
+                name = '%s_%d' % (suffix, wfs)
                 self.add_dispDock(name, self.wao_imagesgroup_cb)
-                name = 'pyrHR_%d' % wfs
-                self.add_dispDock(name, self.wao_imagesgroup_cb)
-                name = 'pyrLR_%d' % wfs
-                self.add_dispDock(name, self.wao_imagesgroup_cb)
-            else:
-                raise "Analyser unknown"
 
         self.ndm = len(self.config.p_dms)
         for dm in range(self.ndm):
@@ -368,9 +476,11 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
         else:
             self.supervisor.openLoop()
             self.uiAO.wao_openLoop.setText("Close Loop")
+        self.invalidateDisplay()
 
     def initConfig(self) -> None:
-        self.supervisor.clearInitSim()
+        with self.loopLock:  # The display fetcher may be reading the buffers being freed
+            self.supervisor.clearInitSim()
         WidgetBase.initConfig(self)
 
     def initConfigThread(self) -> None:
@@ -386,23 +496,26 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
         # Thread carmaWrap context reload:
         self.supervisor.forceContext()
 
+        for entry in self.displays.values():
+            entry.removeOverlays()
+
         for i in range(self.natm):
             key = "atm_%d" % i
             data = self.supervisor.getAtmScreen(i)
-            cx, cy = self.circleCoords(self.config.p_geom.pupdiam / 2, 1000,
-                                       data.shape[0], data.shape[1])
-            self.SRcircles[key] = pg.ScatterPlotItem(cx, cy, pen='r', size=1)
-            self.viewboxes[key].addItem(self.SRcircles[key])
-            self.SRcircles[key].setPoints(cx, cy)
+            entry = self.displays[key]
+            entry.srcircle = PupilPath(
+                    circlePath(self.config.p_geom.pupdiam / 2, CIRCLE_NPTS, data.shape[0],
+                               data.shape[1]))
+            entry.viewbox.addItem(entry.srcircle)
 
         for i in range(self.nwfs):
             key = "wfs_%d" % i
             data = self.supervisor.getWfsPhase(i)
-            cx, cy = self.circleCoords(self.config.p_geom.pupdiam / 2, 1000,
-                                       data.shape[0], data.shape[1])
-            self.SRcircles[key] = pg.ScatterPlotItem(cx, cy, pen='r', size=1)
-            self.viewboxes[key].addItem(self.SRcircles[key])
-            self.SRcircles[key].setPoints(cx, cy)
+            entry = self.displays[key]
+            entry.srcircle = PupilPath(
+                    circlePath(self.config.p_geom.pupdiam / 2, CIRCLE_NPTS, data.shape[0],
+                               data.shape[1]))
+            entry.viewbox.addItem(entry.srcircle)
             key = 'slpComp_%d' % i
             key = 'slpGeom_%d' % i
 
@@ -416,65 +529,55 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
             dm_type = self.config.p_dms[i].type
             alt = self.config.p_dms[i].alt
             data = self.supervisor.getDmShape(i)
-            cx, cy = self.circleCoords(self.config.p_geom.pupdiam / 2, 1000,
-                                       data.shape[0], data.shape[1])
-            self.SRcircles[key] = pg.ScatterPlotItem(cx, cy, pen='r', size=1)
-            self.viewboxes[key].addItem(self.SRcircles[key])
-            self.SRcircles[key].setPoints(cx, cy)
+            entry = self.displays[key]
+            entry.srcircle = PupilPath(
+                    circlePath(self.config.p_geom.pupdiam / 2, CIRCLE_NPTS, data.shape[0],
+                               data.shape[1]))
+            entry.viewbox.addItem(entry.srcircle)
 
         for i in range(len(self.config.p_targets)):
             key = "tar_%d" % i
             data = self.supervisor.getTarPhase(i)
-            cx, cy = self.circleCoords(self.config.p_geom.pupdiam / 2, 1000,
-                                       data.shape[0], data.shape[1])
-            self.SRcircles[key] = pg.ScatterPlotItem(cx, cy, pen='r', size=1)
-            self.viewboxes[key].addItem(self.SRcircles[key])
-            self.SRcircles[key].setPoints(cx, cy)
+            entry = self.displays[key]
+            entry.srcircle = PupilPath(
+                    circlePath(self.config.p_geom.pupdiam / 2, CIRCLE_NPTS, data.shape[0],
+                               data.shape[1]))
+            entry.viewbox.addItem(entry.srcircle)
 
             data = self.supervisor.getTarImage(i)
             for psf in ["psfSE_", "psfLE_"]:
                 key = psf + str(i)
                 Delta = 5
-                self.SRCrossX[key] = pg.PlotCurveItem(
-                        np.array([
-                                data.shape[0] / 2 + 0.5 - Delta,
-                                data.shape[0] / 2 + 0.5 + Delta
-                        ]), np.array([data.shape[1] / 2 + 0.5, data.shape[1] / 2 + 0.5]),
-                        pen='r')
-                self.SRCrossY[key] = pg.PlotCurveItem(
-                        np.array([data.shape[0] / 2 + 0.5, data.shape[0] / 2 + 0.5]),
-                        np.array([
-                                data.shape[1] / 2 + 0.5 - Delta,
-                                data.shape[1] / 2 + 0.5 + Delta
-                        ]), pen='r')
+                x0, y0, x1, y1 = crossArrays(data.shape, Delta)
+                entry = self.displays[key]
+                entry.crossx = pg.PlotCurveItem(x0, y0, pen='r')
+                entry.crossy = pg.PlotCurveItem(x1, y1, pen='r')
                 # Put image in plot area
-                self.viewboxes[key].addItem(self.SRCrossX[key])
+                entry.viewbox.addItem(entry.crossx)
                 # Put image in plot area
-                self.viewboxes[key].addItem(self.SRCrossY[key])
-
-        for i in range(len(self.config.p_wfss)):
-            if (self.config.p_wfss[i].type == scons.WFSType.PYRHR
-                or self.config.p_wfss[i].type == scons.
-                WFSType.PYRLR):
-                key = "pyrFocalPlane_%d" % i
-                data = self.supervisor.getPyrFocalPlane(i)
-                Delta = len(data)/2
-                self.PyrEdgeX[key] = pg.PlotCurveItem(
-                    np.array([
-                        data.shape[0] / 2 + 0.5 - Delta,
-                        data.shape[0] / 2 + 0.5 + Delta
-                    ]), np.array([data.shape[1] / 2 + 0.5, data.shape[1] / 2 + 0.5]),
-                    pen='b')
-                self.PyrEdgeY[key] = pg.PlotCurveItem(
-                    np.array([data.shape[0] / 2 + 0.5, data.shape[0] / 2 + 0.5]),
-                    np.array([
-                        data.shape[1] / 2 + 0.5 - Delta,
-                        data.shape[1] / 2 + 0.5 + Delta
-                    ]), pen='b')
-                # Put image in plot area
-                self.viewboxes[key].addItem(self.PyrEdgeX[key])
-                # Put image in plot area
-                self.viewboxes[key].addItem(self.PyrEdgeY[key])
+                entry.viewbox.addItem(entry.crossy)
+
+        self._validsubStack.clear()
+        for i in np.flatnonzero(self._wfsIsPyr).tolist():
+            self._validsubStack[i] = np.stack(
+                    [self.config.p_wfss[i]._validsubsx, self.config.p_wfss[i]._validsubsy])
+            key = "pyrFocalPlane_%d" % i
+            data = self.supervisor.getPyrFocalPlane(i)
+            Delta = len(data)/2
+            x0, y0, x1, y1 = crossArrays(data.shape, Delta)
+            entry = self.displays[key]
+            entry.pyrx = pg.PlotCurveItem(x0, y0, pen='b')
+            entry.pyry = pg.PlotCurveItem(x1, y1, pen='b')
+            # Put image in plot area
+            entry.viewbox.addItem(entry.pyrx)
+            # Put image in plot area
+            entry.viewbox.addItem(entry.pyry)
+
+        self.buildDockDispatch()
+        self._lastDisplayState = None
+        # Position of each WFS slopes in the centroids vector
+        self._slopeOffsets = np.concatenate(
+                ([0], np.cumsum([2 * p_wfs._nvalid for p_wfs in self.config.p_wfss])))
 
         print(self.supervisor)
 
@@ -491,119 +594,240 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
 
         WidgetBase.initConfigFinished(self)
 
-    def circleCoords(self, ampli: float, npts: int, datashape0: int,
-                     datashape1: int) -> Tuple[float, float]:
-        cx = ampli * np.sin((np.arange(npts) + 1) * 2. * np.pi / npts) + datashape0 / 2
-        cy = ampli * np.cos((np.arange(npts) + 1) * 2. * np.pi / npts) + datashape1 / 2
-        return cx, cy
+    def buildDockDispatch(self) -> None:
+        '''
+            Resolve once, for each display entry, the supervisor getter feeding it
+            so that updateDisplay does not have to parse the dock names
+        '''
+        getters = {
+                "atm": self.supervisor.getAtmScreen,
+                "wfs": self.supervisor.getWfsPhase,
+                "dm": self.supervisor.getDmShape,
+                "tar": self.supervisor.getTarPhase,
+                "psfSE": partial(self.supervisor.getTarImage, expoType="se"),
+                "psfLE": partial(self.supervisor.getTarImage, expoType="le"),
+                "SH": self.supervisor.getWfsImage,
+                "pyrLR": self.supervisor.getWfsImage,
+                "pyrHR": self.supervisor.getPyrHRImage,
+                "pyrFocalPlane": self.supervisor.getPyrFocalPlane,
+                "slpGeom": self.supervisor.getSlopeGeom,
+                "slpComp": lambda index: self.supervisor.getSlope()
+        }  # type: Dict[str, Callable[[int], np.ndarray]]
+
+        self._displayGeneration += 1
+        for key, entry in self.displays.items():
+            kind, _, index = key.rpartition("_")
+            if kind in getters:
+                entry.getter = getters[kind]
+                entry.index = int(index)
+                entry.kind = kind
+
+    def cleanUp(self) -> None:
+        self.fetcherThread.quit()
+        self.fetcherThread.wait()
+        WidgetBase.cleanUp(self)
 
     def clearSR(self):
-        self.SRLE = deque(maxlen=20)
-        self.SRSE = deque(maxlen=20)
-        self.numiter = deque(maxlen=20)
+        self._srhead = 0
+        self._srfilled = 0
+        self.invalidateDisplay()
 
     def updateSRDisplay(self, SRLE, SRSE, numiter):
-        self.SRLE.append(SRLE)
-        self.SRSE.append(SRSE)
-        self.numiter.append(numiter)
-        self.curveSRSE.setData(self.numiter, self.SRSE)
-        self.curveSRLE.setData(self.numiter, self.SRLE)
+        self._srle[self._srhead] = SRLE
+        self._srse[self._srhead] = SRSE
+        self._niter[self._srhead] = numiter
+        self._srhead = (self._srhead + 1) % self.rollingWindow
+        self._srfilled = min(self._srfilled + 1, self.rollingWindow)
+        if self._srfilled < self.rollingWindow:
+            numiter = self._niter[:self._srfilled]
+            SRSE = self._srse[:self._srfilled]
+            SRLE = self._srle[:self._srfilled]
+        else:  # Buffers are full: oldest sample is at the write position
+            numiter = np.roll(self._niter, -self._srhead)
+            SRSE = np.roll(self._srse, -self._srhead)
+            SRLE = np.roll(self._srle, -self._srhead)
+        self.curveSRSE.setData(numiter, SRSE)
+        self.curveSRLE.setData(numiter, SRLE)
+
+    def psfLogScale(self, entry: DisplayEntry, data: np.ndarray) -> np.ndarray:
+        '''
+            Return log10(data) computed in a scratch buffer owned by the dock entry
+            Non-positive values are clipped to the smallest positive value of the
+            image, rescanned every levelsRefresh calls (np.finfo.tiny if there is none)
+        '''
+        buf = entry.logbuf
+        if buf is None or buf.shape != data.shape or buf.dtype != data.dtype:
+            buf = np.empty_like(data)
+            entry.logbuf = buf
+            entry.logfloorAge = self.levelsRefresh
+        if entry.logfloorAge >= self.levelsRefresh:
+            floor = np.min(data, where=data > 0, initial=np.inf)
+            if not np.isfinite(floor):
+                floor = np.finfo(data.dtype).tiny
+            entry.logfloor = floor
+            entry.logfloorAge = 0
+        entry.logfloorAge += 1
+        if display_util.psf_log_scale is None:
+            np.maximum(data, entry.logfloor, out=buf)
+            return np.log10(buf, out=buf)
+        # The fused kernel gives the levels for free: no need to rescan the image
+        lo, hi = display_util.psf_log_scale(data, data.dtype.type(entry.logfloor), buf)
+        self.setImageLevels(entry, lo, hi, logScale=True)
+        return buf
+
+    def imageLevels(self, entry: DisplayEntry, data: np.ndarray,
+                    logScale: bool = False) -> Tuple[float, float]:
+        '''
+            Return the display levels of the dock entry
+            They are computed from data every levelsRefresh calls, and clamped to
+            6 decades below the maximum for log scaled images
+        '''
+        if entry.levels is None or entry.levelsAge >= self.levelsRefresh:
+            self.setImageLevels(entry, np.min(data), np.max(data), logScale=logScale)
+        entry.levelsAge += 1
+        return entry.levels
+
+    def setImageLevels(self, entry: DisplayEntry, lo: float, hi: float,
+                       logScale: bool = False) -> None:
+        '''
+            Set the display levels of the dock entry from the data min and max
+        '''
+        lo, hi = float(lo), float(hi)
+        if logScale:
+            lo = max(lo, hi - 6)
+        if hi <= lo:
+            hi = lo + 1
+        entry.levels = (lo, hi)
+        entry.levelsAge = 0
+
+    def clearImageLevels(self, *args) -> None:
+        for entry in self.displays.values():
+            entry.levels = None
+            entry.levelsAge = 0
+
+    def invalidateDisplay(self) -> None:
+        '''
+            Fetch the displayed data again at the next updateDisplay
+            To be called after changing the simulation without running an iteration
+        '''
+        self._lastDisplayState = None
+
+    def isDisplayCurrent(self, generation: int) -> bool:
+        '''
+            Return True if a display request of this generation still matches
+            the initialized simulation
+        '''
+        return (generation == self._displayGeneration and self.supervisor is not None and
+                getattr(self.supervisor, '_sim', None) is not None and
+                self.supervisor.isInit())
 
     def updateDisplay(self) -> None:
+        '''
+            Request the data of the visible docks to the display fetcher thread
+        '''
         if (self.supervisor is None or not hasattr(self.supervisor, '_sim') or
                     self.supervisor._sim is None or not self.supervisor.isInit()):
             # print("Widget not fully initialized")
             return
-        if not self.loopLock.acquire(False):
+        if self._fetchPending:
             return
+        # Nothing to redraw if no iteration ran and the displayed docks did not change
+        visibleKeys = frozenset(self._visibleKeys)
+        displayState = (self.supervisor.getFrameCounter(), visibleKeys,
+                        self.uiAO.actionPSF_Log_Scale.isChecked())
+        if displayState != self._lastDisplayState or self._idleTicks >= self.idleRefreshTicks:
+            keys = visibleKeys
+            self._lastDisplayState = displayState
+            self._idleTicks = 0
+        elif self._staleSlopes & visibleKeys:
+            keys = self._staleSlopes & visibleKeys
         else:
-            try:
-                for key, dock in self.docks.items():
-                    if key == "Strehl":
-                        continue
-                    elif dock.isVisible():
-                        index = int(key.split("_")[-1])
-                        data = None
-                        if "atm" in key:
-                            data = self.supervisor.getAtmScreen(index)
-                        if "wfs" in key:
-                            data = self.supervisor.getWfsPhase(index)
-                        if "dm" in key:
-                            dm_type = self.config.p_dms[index].type
-                            alt = self.config.p_dms[index].alt
-                            data = self.supervisor.getDmShape(index)
-                        if "tar" in key:
-                            data = self.supervisor.getTarPhase(index)
-                        if "psfLE" in key:
-                            data = self.supervisor.getTarImage(index, "le")
-                        if "psfSE" in key:
-                            data = self.supervisor.getTarImage(index, "se")
-
-                        if "psf" in key:
-                            if (self.uiAO.actionPSF_Log_Scale.isChecked()):
-                                if np.any(data <= 0):
-                                    # warnings.warn("\nZeros founds, filling with min nonzero value.\n")
-                                    data[data <= 0] = np.min(data[data > 0])
-                                data = np.log10(data)
-                            if (self.supervisor.getFrameCounter() < 10):
-                                self.viewboxes[key].setRange(
-                                        xRange=(data.shape[0] / 2 + 0.5 - self.PSFzoom,
-                                                data.shape[0] / 2 + 0.5 + self.PSFzoom),
-                                        yRange=(data.shape[1] / 2 + 0.5 - self.PSFzoom,
-                                                data.shape[1] / 2 + 0.5 + self.PSFzoom),
-                                )
-
-                        if "SH" in key:
-                            data = self.supervisor.getWfsImage(index)
-                        if "pyrLR" in key:
-                            data = self.supervisor.getWfsImage(index)
-                        if "pyrHR" in key:
-                            data = self.supervisor.getPyrHRImage(index)
-                        if "pyrFocalPlane" in key:
-                            data = self.supervisor.getPyrFocalPlane(index)
-
-                        if (data is not None):
-                            autoscale = True  # self.uiAO.actionAuto_Scale.isChecked()
-                            # if (autoscale):
-                            #     # inits levels
-                            #     self.hist.setLevels(data.min(), data.max())
-                            self.imgs[key].setImage(data, autoLevels=autoscale)
-                            # self.p1.autoRange()
-                        elif "slp" in key:  # Slope display
-                            self.imgs[key].canvas.axes.clear()
-                            if "Geom" in key:
-                                slopes = self.supervisor.getSlopeGeom(index)
-                                x, y, vx, vy = plsh(
-                                        slopes, self.config.p_wfss[index].nxsub,
-                                        self.config.p_tel.cobs, returnquiver=True
-                                )  # Preparing mesh and vector for display
-                            if "Comp" in key:
-                                centroids = self.supervisor.getSlope()
-                                nmes = [
-                                        2 * p_wfs._nvalid for p_wfs in self.config.p_wfss
-                                ]
-                                first_ind = np.sum(nmes[:index], dtype=np.int32)
-                                if (self.config.p_wfss[index].type == scons.WFSType.PYRHR
-                                            or self.config.p_wfss[index].type == scons.
-                                            WFSType.PYRLR):
-                                    #TODO: DEBUG...
-                                    plpyr(
-                                            centroids[first_ind:first_ind + nmes[index]],
-                                            np.stack([
-                                                    wao.config.p_wfss[index]._validsubsx,
-                                                    wao.config.p_wfss[index]._validsubsy
-                                            ]))
-                                else:
-                                    x, y, vx, vy = plsh(
-                                            centroids[first_ind:first_ind + nmes[index]],
-                                            self.config.p_wfss[index].nxsub,
-                                            self.config.p_tel.cobs, returnquiver=True
-                                    )  # Preparing mesh and vector for display
-                                self.imgs[key].canvas.axes.quiver(x, y, vx, vy)
-                            self.imgs[key].canvas.draw()
-                self.firstTime = 1
-            finally:
-                self.loopLock.release()
+            self._idleTicks += 1
+            return
+
+        # Matplotlib slope displays are fetched and redrawn at most every slopeRefreshTime
+        slopesDue = time.time() - self._lastSlopeDraw >= self.slopeRefreshTime
+        staleSlopes = set()
+        slopesRequested = False
+        requests = []
+        for key in keys:
+            entry = self.displays.get(key)
+            if entry is None or entry.getter is None:
+                continue
+            if entry.kind in ("slpGeom", "slpComp"):
+                if not slopesDue:
+                    staleSlopes.add(key)
+                    continue
+                # Both getters return the slopes of every WFS of the controller 0,
+                # fetched once for all the slope docks and sliced by drawSlopes
+                requests.append((key, entry.getter, 0))
+                slopesRequested = True
+            else:
+                requests.append((key, entry.getter, entry.index))
+        self._staleSlopes = frozenset(staleSlopes)
+        if slopesRequested:
+            self._lastSlopeDraw = time.time()
+        if requests:
+            self._fetchPending = True
+            self.fetchRequested.emit(self._displayGeneration, requests)
+
+    def drawSlopes(self, entry: DisplayEntry, slopes: np.ndarray) -> None:
+        '''
+            Update the quiver plot of the slope dock entry
+            The quiver is created on the first call, then only its vectors are updated
+        '''
+        index = entry.index
+        slopes = slopes[self._slopeOffsets[index]:self._slopeOffsets[index + 1]]
+        if self._wfsIsPyr[index]:
+            # Drawn on the dock canvas, not on the global pyplot figure
+            nslopes = slopes.shape[0] // 2
+            x, y = self._validsubStack[index]
+            vx, vy = slopes[:nslopes], slopes[nslopes:]
+        else:
+            x, y, vx, vy = plsh(slopes, self.config.p_wfss[index].nxsub,
+                                self.config.p_tel.cobs,
+                                returnquiver=True)  # Preparing mesh and vector for display
+        canvas = entry.img.canvas
+        if entry.quiver is None:
+            canvas.axes.clear()
+            entry.quiver = canvas.axes.quiver(x, y, vx, vy)
+        else:  # The subapertures mesh does not change
+            entry.quiver.scale = None  # Autoscale again at the next draw, as the slopes converge
+            entry.quiver.set_UVC(vx, vy)
+        canvas.draw_idle()
+
+    def displayData(self, generation: int, frames: Dict[str, np.ndarray]) -> None:
+        '''
+            Callback when the display fetcher thread has pulled the requested data
+        '''
+        self._fetchPending = False
+        if generation != self._displayGeneration:
+            return
+        for key, data in frames.items():
+            entry = self.displays[key]
+            kind = entry.kind
+            if kind in ("slpGeom", "slpComp"):  # Slope display
+                self.drawSlopes(entry, data)
+                continue
+
+            if kind in ("psfSE", "psfLE"):
+                if (self.uiAO.actionPSF_Log_Scale.isChecked()):
+                    data = self.psfLogScale(entry, data)
+                if (self.supervisor.getFrameCounter() < 10):
+                    entry.viewbox.setRange(
+                            xRange=(data.shape[0] / 2 + 0.5 - self.PSFzoom,
+                                    data.shape[0] / 2 + 0.5 + self.PSFzoom),
+                            yRange=(data.shape[1] / 2 + 0.5 - self.PSFzoom,
+                                    data.shape[1] / 2 + 0.5 + self.PSFzoom),
+                    )
+
+            # Levels are only rescanned every levelsRefresh frames
+            levels = self.imageLevels(entry, data, logScale=kind in ("psfSE", "psfLE") and
+                                      self.uiAO.actionPSF_Log_Scale.isChecked())
+            entry.img.setImage(data, autoLevels=False, levels=levels)
+
+            # self.p1.autoRange()
+        self.firstTime = 1
 
     def updateSRSE(self, SRSE):
         self.uiAO.wao_strehlSE.setText(SRSE)
@@ -614,32 +838,29 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
     def updateCurrentLoopFrequency(self, freq):
         self.uiAO.wao_currentFreq.setValue(freq)
 
-    def loopOnce(self) -> None:
+    def loopOnce(self) -> bool:
+        '''
+            Run one AO loop iteration, return False if it was skipped
+            because the display fetcher holds the simulation
+        '''
         if not self.loopLock.acquire(False):
-            print("Display locked")
-            return
+            return False
         else:
             try:
                 start = time.time()
+                # singleNext already computes and accumulates every target image
                 self.supervisor.singleNext(showAtmos=self.supervisor._seeAtmos)
-                for t in self.supervisor._sim.tar.d_targets:
-                    t.comp_image()
                 loopTime = time.time() - start
 
                 refreshDisplayTime = 1. / self.uiBase.wao_frameRate.value()
 
                 if (time.time() - self.refreshTime > refreshDisplayTime):
-                    signal_le = ""
-                    signal_se = ""
-                    for t in range(len(self.config.p_targets)):
-                        SR = self.supervisor.getStrehl(t)
-                        # TODO: handle that !
-                        if (t == self.uiAO.wao_dispSR_tar.value()
-                            ):  # Plot on the wfs selected
-                            self.updateSRDisplay(SR[1], SR[0],
-                                                 self.supervisor.getFrameCounter())
-                        signal_se += "%1.2f   " % SR[0]
-                        signal_le += "%1.2f   " % SR[1]
+                    SRSE, SRLE = self.supervisor.getAllStrehl()
+                    # TODO: handle that !
+                    t = self.uiAO.wao_dispSR_tar.value()  # Plot on the target selected
+                    self.updateSRDisplay(SRLE[t], SRSE[t], self.supervisor.getFrameCounter())
+                    signal_se = "   ".join(["%1.2f" % sr for sr in SRSE])
+                    signal_le = "   ".join(["%1.2f" % sr for sr in SRLE])
 
                     currentFreq = 1 / loopTime
                     refreshFreq = 1 / (time.time() - self.refreshTime)
@@ -655,14 +876,15 @@ class widgetAOWindow(AOClassTemplate, WidgetBase):
                                    signal_se, refreshFreq, currentFreq))
 
                     self.refreshTime = start
-            except:
-                print("error!!")
+            except (RuntimeError, ValueError, AttributeError):
+                logging.exception("Loop iteration failed")
             finally:
                 self.loopLock.release()
+            return True
 
     def run(self):
-        WidgetBase.run(self)
-        if not self.uiAO.wao_forever.isChecked():
+        ran = WidgetBase.run(self)
+        if ran and not self.uiAO.wao_forever.isChecked():
             self.nbiter -= 1
 
         if self.nbiter <= 0:
@@ -38,19 +38,35 @@
 
 import os
 import sys
+import logging
 import threading
 import warnings
-from typing import Any, Callable, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Set, Tuple
 
 import numpy as np
 import pyqtgraph as pg
 from PyQt5 import QtGui, QtWidgets
-from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal, pyqtSlot
 from PyQt5.uic import loadUiType
 from pyqtgraph.dockarea import Dock, DockArea
 
+from shesha.util import display_util
 from shesha.util.matplotlibwidget import MatplotlibWidget
 
+# Let the image lookup tables be applied by numba whenever it is available. OpenGL
+# rendering of the views is unstable in pyqtgraph and breaks remote sessions: it is
+# only enabled on request, with SHESHA_USE_OPENGL=1. This has to be set before any
+# pyqtgraph widget is created. imageAxisOrder is kept to its col-major default,
+# the overlays being placed with data.shape[0] along x.
+if os.environ.get("SHESHA_USE_OPENGL", "0") not in ("", "0"):
+    try:
+        from PyQt5 import QtOpenGL  # noqa: F401
+        pg.setConfigOptions(useOpenGL=True)
+    except ImportError:
+        warnings.warn("SHESHA_USE_OPENGL is set but PyQt5.QtOpenGL is not available")
+if "useNumba" in pg.CONFIG_OPTIONS and display_util.HAS_NUMBA:
+    pg.setConfigOptions(useNumba=True)
+
 
 def uiLoader(moduleName):
     return loadUiType(os.environ["SHESHA_ROOT"] +
@@ -60,13 +76,11 @@ def uiLoader(moduleName):
 BaseWidgetTemplate, BaseClassTemplate = uiLoader('widget_base')
 
 
-class PupilBoxes(pg.QtGui.QGraphicsPathItem):
+class PupilPath(pg.QtGui.QGraphicsPathItem):
 
-    def __init__(self, x, y):
-        """x and y are 2D arrays of shape (Nplots, Nsamples)"""
-        connect = np.ones(x.shape, dtype=bool)
-        connect[:, -1] = 0  # don't draw the segment between each trace
-        self.path = pg.arrayToQPath(x.flatten(), y.flatten(), connect.flatten())
+    def __init__(self, path):
+        """path is a QPainterPath, which can be shared between several items"""
+        self.path = path
         pg.QtGui.QGraphicsPathItem.__init__(self, self.path)
         self.setPen(pg.mkPen('r'))
 
@@ -77,6 +91,29 @@ class PupilBoxes(pg.QtGui.QGraphicsPathItem):
         return self.path.boundingRect()
 
 
+class PupilBoxes(PupilPath):
+
+    def __init__(self, x, y):
+        """x and y are 2D arrays of shape (Nplots, Nsamples)"""
+        connect = np.ones(x.shape, dtype=bool)
+        connect[:, -1] = 0  # don't draw the segment between each trace
+        PupilPath.__init__(self, pg.arrayToQPath(x.flatten(), y.flatten(), connect.flatten()))
+
+
+class DisplayDock(Dock):
+    """Dock emitting visibilityChanged when it is shown or hidden"""
+
+    visibilityChanged = pyqtSignal(bool)
+
+    def showEvent(self, event: Any) -> None:
+        Dock.showEvent(self, event)
+        self.visibilityChanged.emit(True)
+
+    def hideEvent(self, event: Any) -> None:
+        Dock.hideEvent(self, event)
+        self.visibilityChanged.emit(False)
+
+
 class WidgetBase(BaseClassTemplate):
 
     def __init__(self, parent=None, hideHistograms=False) -> None:
@@ -127,6 +164,7 @@ class WidgetBase(BaseClassTemplate):
         self.viewboxes = {}  # type: Dict[str, pg.ViewBox]
         self.imgs = {}  # type: Dict[str, pg.ImageItem]
         self.hists = {}  # type: Dict[str, pg.HistogramLUTItem]
+        self._visibleKeys = set()  # type: Set[str]
 
         self.PupilLines = None
         self.adjustSize()
@@ -149,11 +187,18 @@ class WidgetBase(BaseClassTemplate):
         if reply == QtWidgets.QMessageBox.Yes:
             if event:
                 event.accept()
+            self.cleanUp()
             quit()
         else:
             if event:
                 event.ignore()
 
+    def cleanUp(self) -> None:
+        '''
+            Called before quitting, to stop the threads owned by the widget
+        '''
+        pass
+
     #############################################################
     #                       METHODS                             #
     #############################################################
@@ -258,10 +303,12 @@ class WidgetBase(BaseClassTemplate):
         parent.addAction(checkableAction)
         self.disp_checkboxes.append(checkBox)
 
-        d = Dock(name)  # , closable=True)
+        d = DisplayDock(name)  # , closable=True)
         self.docks[name] = d
+        d.visibilityChanged.connect(lambda visible, key=name: self._onDockVis(key, visible))
         if type == "pg_image":
             img = pg.ImageItem(border='w')
+            img.setAutoDownsample(True)  # Large PSFs are downsampled when zoomed out
             self.imgs[name] = img
 
             viewbox = pg.ViewBox()
@@ -291,6 +338,15 @@ class WidgetBase(BaseClassTemplate):
         #     d.addWidget(self.uiBase.wao_Strehl)
         return d
 
+    def _onDockVis(self, key: str, visible: bool) -> None:
+        '''
+            Callback when a dock is shown or hidden: keep the set of visible docks
+        '''
+        if visible:
+            self._visibleKeys.add(key)
+        else:
+            self._visibleKeys.discard(key)
+
     def loadConfig(self, *args, **kwargs) -> None:
         '''
             Callback when 'LOAD' button is hit
@@ -314,6 +370,7 @@ class WidgetBase(BaseClassTemplate):
         self.docks.clear()
         self.imgs.clear()
         self.viewboxes.clear()
+        self._visibleKeys.clear()
 
         self.wao_phasesgroup_cb = QtGui.QMenu(self)
         self.uiBase.wao_phasesgroup_tb.setMenu(self.wao_phasesgroup_cb)
@@ -392,10 +449,15 @@ class WidgetBase(BaseClassTemplate):
         # This seems to trigger the GUI and keep it responsive
         print(text, end='\r', flush=True)
 
-    def run(self):
-        self.loopOnce()
+    def run(self) -> bool:
+        '''
+            Run one loop iteration and schedule the next one
+            Return False if the iteration was skipped
+        '''
+        ran = self.loopOnce()
         if not self.stop:
             QTimer.singleShot(0, self.run)  # Update loop
+        return ran
 
 
 class WorkerThread(QThread):
@@ -412,3 +474,41 @@ class WorkerThread(QThread):
 
     def cleanUp(self) -> None:
         pass
+
+
+class DisplayFetcher(QObject):
+    """
+        Pull the display data out of the simulation from its own thread,
+        so that the GUI thread only has to draw them
+    """
+
+    dataReady = pyqtSignal(int, object)  # object: no conversion to a QVariantMap
+
+    def __init__(self, lock: threading.Lock, isCurrent: Callable[[int], bool],
+                 context: Callable = None) -> None:
+        QObject.__init__(self)
+        self.lock = lock
+        self.isCurrent = isCurrent
+        self.context = context
+
+    @pyqtSlot(int, object)
+    def fetchAll(self, generation: int, requests: list) -> None:
+        """requests is a list of (key, getter, index), getter(index) returning the data"""
+        frames = {}
+        fetched = {}  # Docks sharing a getter and index are only fetched once
+        # One lock for the whole set, so that all the docks show the same iteration
+        with self.lock:
+            if self.isCurrent(generation):
+                if self.context is not None:
+                    self.context()
+                for key, getter, index in requests:
+                    data = fetched.get((getter, index))
+                    if data is None:
+                        try:
+                            data = getter(index)
+                        except (RuntimeError, ValueError, IndexError, AttributeError):
+                            logging.exception("%s not fetched", key)
+                            continue
+                        fetched[(getter, index)] = data
+                    frames[key] = data
+        self.dataReady.emit(generation, frames)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from shesha.util import display_util
+
+pytestmark = pytest.mark.skipif(not display_util.HAS_NUMBA, reason="numba is not installed")
+
+precision = 1e-5
+
+
+def numpy_log_scale(data, floor):
+    out = np.log10(np.maximum(data, floor))
+    return out, out.min(), out.max()
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_psf_log_scale(dtype):
+    rng = np.random.default_rng(0)
+    data = rng.exponential(size=(64, 48)).astype(dtype)
+    data[::7, ::5] = 0
+    data[3, 4] = -1
+    floor = dtype(np.min(data[data > 0]))
+    out = np.empty_like(data)
+    lo, hi = display_util.psf_log_scale(data, floor, out)
+    expected, expected_lo, expected_hi = numpy_log_scale(data, floor)
+    np.testing.assert_allclose(out, expected, rtol=precision, atol=precision)
+    assert lo == pytest.approx(expected_lo, abs=precision)
+    assert hi == pytest.approx(expected_hi, abs=precision)
+
+
+def test_psf_log_scale_extremum_at_first_pixel():
+    data = np.full((8, 8), 10., dtype=np.float32)
+    data[0, 0] = 1e4
+    out = np.empty_like(data)
+    lo, hi = display_util.psf_log_scale(data, np.float32(1e-30), out)
+    assert lo == pytest.approx(1.)
+    assert hi == pytest.approx(4.)
+
+
+def test_warmup():
+    display_util.warmup()